@@ -1,42 +1,67 @@
 import csv
+from bisect import bisect_left, bisect_right
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from math import sqrt
-from typing import Union, Tuple
+from typing import Optional, Union, Tuple
 from pathlib import Path
-import xml.etree.ElementTree as ET
+from xml.parsers import expat
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from contextlib import closing
 from functools import lru_cache
+from operator import itemgetter
+
+log = logging.getLogger(__name__)
 
 DEFAULT_Z = 2.576  # z-score for 99.5% one-sided Wilson interval
 
 
-def wilson_lower_bound_10pt(n: int, S: Union[int, float], z: float = DEFAULT_Z) -> float:
-    if n <= 0:
-        return 0.0
-    R = S / n
-    p = (R - 1) / 9.0
-    denom = 1 + z * z / n
-    centre = p + z * z / (2 * n)
-    adj = z * sqrt((p * (1 - p) + z * z / (4 * n)) / n)
+def _wilson_vec(n: np.ndarray, S: np.ndarray, z: float = DEFAULT_Z) -> np.ndarray:
+    """Wilson lower bound on the 1-10 scale for arrays of vote counts and rating sums."""
+    # Evaluate every lane with n clamped to 1 and mask the n <= 0 rows at the
+    # end, so the arithmetic stays branch-free and never divides by zero.
+    inv_n = 1.0 / np.maximum(n, 1)
+    z2_n = (z * z) * inv_n
+    p = (S * inv_n - 1) * (1 / 9.0)
+    denom = 1 + z2_n
+    centre = p + 0.5 * z2_n
+    adj = z * np.sqrt(np.maximum(p * (1 - p) + 0.25 * z2_n, 0.0) * inv_n)
     wlb = (centre - adj) / denom
-    return 1 + 9 * wlb
+    return np.where(n > 0, 1 + 9 * wlb, 0.0)
+
+
+def wilson_lower_bound_10pt(n: int, S: Union[int, float], z: float = DEFAULT_Z) -> float:
+    return float(_wilson_vec(np.float64(n), np.float64(S), z))
 
 
 PRIOR_VOTES = 25  # pseudo-ratings to reduce team-voting effects
 PRIOR_RATING = 6.5  # use a realistic prior around the global average
+_PRIOR_SUM = PRIOR_VOTES * PRIOR_RATING  # rating sum contributed by the prior votes
 
 
 def weighted_score(n: int, S: Union[int, float]) -> float:
     """Wilson lower bound with prior votes at rating PRIOR_RATING."""
-    return wilson_lower_bound_10pt(n + PRIOR_VOTES, S + PRIOR_VOTES * PRIOR_RATING)
+    return wilson_lower_bound_10pt(n + PRIOR_VOTES, S + _PRIOR_SUM)
 
 
 def latest_csv() -> str:
     """Return the path to the newest ratings CSV in the current directory."""
-    files = sorted(Path(".").glob("20*.csv"))
-    if not files:
+    with os.scandir(".") as entries:
+        latest = max(
+            (e.name for e in entries if e.name.startswith("20") and e.name.endswith(".csv")),
+            default=None,
+        )
+    if latest is None:
         raise FileNotFoundError("No ratings CSV found")
-    return str(files[-1])
+    return latest
 
 
 def timestamp_from_csv(path: str) -> str:
@@ -49,194 +74,374 @@ def timestamp_from_csv(path: str) -> str:
         return stem
 
 
+_RANK_LIMITS = (200, 1000)  # inclusive upper bounds
+_RANK_STATUS = (("🔥", "Bestseller"), ("🔎", "Rare find"), ("💎", "Hidden gem"))
+
+
 def status_for_rank(rank: int) -> Tuple[str, str]:
     """Return emoji and label for a game's BGG rank."""
-    if rank <= 200:
-        return "🔥", "Bestseller"
-    if rank <= 1000:
-        return "🔎", "Rare find"
-    return "💎", "Hidden gem"
+    return _RANK_STATUS[bisect_left(_RANK_LIMITS, rank)]
+
+
+class _StopParsing(Exception):
+    """Raised from an expat callback to end a parse early."""
+
+
+def _parse_items(xml: Union[str, bytes], first_only: bool = False) -> list:
+    """Return ``(id, details)`` for each top-level <item> of a BGG thing response.
+
+    With ``first_only`` parsing stops as soon as the first <item> is closed.
+    """
+    items = []
+    tags = []  # names of the open elements; <items> is depth 0, its <item>s depth 1
+    item = None  # fields of the <item> being read
+    versions_depth = None  # depth of that item's first <versions> element
+    versions_open = False
+
+    def add_version(vid):
+        if vid and vid != item["id"]:
+            item["versions"].add(vid)
+
+    def start(tag, attrs):
+        nonlocal item, versions_depth, versions_open
+        depth = len(tags)
+        tags.append(tag)
+        if depth == 1:
+            if tag == "item":
+                item = {
+                    "id": attrs.get("id"),
+                    "type": attrs.get("type"),
+                    "weight": 0.0,
+                    "reimplements": False,
+                    "versions": set(),  # listed under <versions> or linked inbound
+                }
+                versions_depth = None
+                versions_open = False
+            return
+        if item is None:
+            return
+        if tag == "link":
+            if attrs.get("inbound") == "true":
+                link_type = attrs.get("type")
+                if link_type == "boardgameimplementation":
+                    item["reimplements"] = True
+                elif link_type == "boardgameversion":
+                    add_version(attrs.get("id"))
+        elif tag == "item":
+            if versions_open and depth == versions_depth + 1:
+                add_version(attrs.get("id"))
+        elif tag == "versions":
+            if versions_depth is None:
+                versions_depth = depth
+                versions_open = True
+        elif tag == "averageweight":
+            if depth == 4 and tags[2] == "statistics" and tags[3] == "ratings":
+                value = attrs.get("value")
+                item["weight"] = float(value) if value else 0.0
+
+    def end(tag):
+        nonlocal item, versions_open
+        tags.pop()
+        depth = len(tags)
+        if depth == versions_depth:
+            versions_open = False
+        elif depth == 1 and item is not None and tag == "item":
+            items.append(
+                (
+                    item["id"],
+                    {
+                        "weight": item["weight"],
+                        "is_expansion": item["type"] == "boardgameexpansion",
+                        "reimplements": item["reimplements"],
+                        "version_count": len(item["versions"]),
+                    },
+                )
+            )
+            item = None
+            if first_only:
+                raise _StopParsing
+
+    # A single expat pass: the callbacks pick out the few attributes we need
+    # and no element objects are ever built.
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    try:
+        parser.Parse(xml, True)
+    except _StopParsing:
+        pass
+    return items
 
 
-def parse_details(xml: str) -> dict:
+def parse_details(xml: Union[str, bytes]) -> dict:
     """Parse details XML from BGG."""
-    tree = ET.fromstring(xml)
-    item = tree.find("item")
-    weight_node = item.find("./statistics/ratings/averageweight")
-    weight = float(weight_node.attrib.get("value", "0")) if weight_node is not None else 0.0
-    is_expansion = item.attrib.get("type") == "boardgameexpansion"
-    reimplements = (
-        item.find(".//link[@type='boardgameimplementation'][@inbound='true']") is not None
-    )
-    versions_node = item.find(".//versions")
-    version_ids = {v.attrib.get("id") for v in versions_node.findall("item")} if versions_node is not None else set()
-    inbound_ids = {
-        v.attrib.get("id")
-        for v in item.findall(".//link[@type='boardgameversion'][@inbound='true']")
-    }
-    root_id = item.attrib.get("id")
-    version_ids.discard(root_id)
-    inbound_ids.discard(root_id)
-    version_count = len(version_ids | inbound_ids)
+    items = _parse_items(xml, first_only=True)
+    if not items:
+        raise ValueError("BGG response contains no <item>")
+    return items[0][1]  # only the first <item> is of interest
+
+
+DETAIL_FIELDS = ("weight", "is_expansion", "reimplements", "version_count")
+
+
+BGG_MIN_INTERVAL = 1.0  # seconds between BGG API requests, shared by all workers
+BGG_BATCH_SIZE = 20  # ids per thing request; BGG rejects larger batches
+FETCH_WORKERS = 4
+
+
+class RateLimiter:
+    """Space out calls to ``wait`` by at least ``interval`` seconds across threads."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+_bgg_limiter = RateLimiter(BGG_MIN_INTERVAL)
+
+# One pooled keep-alive session for all BGG calls instead of a new TLS
+# connection per request.
+_session = requests.Session()
+_session.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=FETCH_WORKERS,
+        max_retries=Retry(
+            total=3, backoff_factor=1, status_forcelist=(429, 500, 502, 503, 504)
+        ),
+    ),
+)
+
+CACHE_PATH = "bgg_cache.sqlite"  # on-disk cache of parsed BGG details
+CACHE_TTL = 30 * 24 * 3600  # seconds before cached details are fetched again
+# Bump whenever parsing changes what ends up in the details, so entries
+# written by an older parser are discarded instead of served for CACHE_TTL.
+CACHE_FORMAT = 1
+
+
+def _cache_connect() -> sqlite3.Connection:
+    con = sqlite3.connect(CACHE_PATH, timeout=30)
+    with con:
+        con.execute(
+            "CREATE TABLE IF NOT EXISTS details "
+            "(id INTEGER PRIMARY KEY, fetched_at REAL NOT NULL, data TEXT NOT NULL)"
+        )
+        if con.execute("PRAGMA user_version").fetchone()[0] != CACHE_FORMAT:
+            con.execute("DELETE FROM details")
+            con.execute(f"PRAGMA user_version = {CACHE_FORMAT:d}")
+    return con
+
+
+def _cache_get(game_ids) -> dict:
+    """Return cached details for those of ``game_ids`` that are present and fresh."""
+    cutoff = time.time() - CACHE_TTL
+    found = {}
+    with closing(_cache_connect()) as con:
+        for game_id in game_ids:
+            row = con.execute(
+                "SELECT data FROM details WHERE id = ? AND fetched_at >= ?",
+                (game_id, cutoff),
+            ).fetchone()
+            if row:
+                found[game_id] = json.loads(row[0])
+    return found
+
+
+def _cache_put(details: dict) -> None:
+    now = time.time()
+    with closing(_cache_connect()) as con, con:
+        con.executemany(
+            "INSERT OR REPLACE INTO details (id, fetched_at, data) VALUES (?, ?, ?)",
+            [(game_id, now, json.dumps(d)) for game_id, d in details.items()],
+        )
+
+
+def _fetch_batch(game_ids) -> dict:
+    """Request up to BGG_BATCH_SIZE games in one call; failed calls return {}."""
+    ids = ",".join(map(str, game_ids))
+    url = f"https://api.geekdo.com/xmlapi2/thing?id={ids}&stats=1&versions=1"
+    try:
+        _bgg_limiter.wait()
+        r = _session.get(url, timeout=30)
+        r.raise_for_status()
+        details = {int(item_id): d for item_id, d in _parse_items(r.content) if item_id}
+    except Exception:
+        return {}
+    try:
+        _cache_put(details)
+    except sqlite3.Error as e:
+        log.warning("Could not cache BGG details for %s: %s", ids, e)
+    return details
+
+
+def fetch_details_many(game_ids) -> dict:
+    """Return extra info from BGG for several games, keyed by game id.
+
+    Fresh entries come from the on-disk cache when it is readable; the rest
+    are requested in batches of BGG_BATCH_SIZE ids, a few batches at a time.
+    A cache that cannot be opened only costs the lookups, never the run.
+    """
+    ids = list(dict.fromkeys(game_ids))
+    try:
+        found = _cache_get(ids)
+    except sqlite3.Error as e:
+        log.warning("Could not read the BGG details cache: %s", e)
+        found = {}
+    missing = [game_id for game_id in ids if game_id not in found]
+    batches = [
+        missing[i : i + BGG_BATCH_SIZE] for i in range(0, len(missing), BGG_BATCH_SIZE)
+    ]
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        for fetched in pool.map(_fetch_batch, batches):
+            found.update(fetched)
     return {
-        "weight": weight,
-        "is_expansion": is_expansion,
-        "reimplements": reimplements,
-        "version_count": version_count,
+        game_id: found.get(game_id)
+        or {"weight": 0.0, "is_expansion": False, "reimplements": False, "version_count": 0}
+        for game_id in ids
     }
 
 
 @lru_cache(maxsize=None)
 def fetch_details(game_id: int):
     """Return extra info from BGG: weight and flags."""
-    url = f"https://api.geekdo.com/xmlapi2/thing?id={game_id}&stats=1&versions=1"
-    try:
-        r = requests.get(url, timeout=30)
-        r.raise_for_status()
-        return parse_details(r.text)
-    except Exception:
-        return {"weight": 0.0, "is_expansion": False, "reimplements": False, "version_count": 0}
+    return fetch_details_many([game_id])[game_id]
+
+
+_WEIGHT_LIMITS = (2, 3, 4)  # exclusive upper bounds
+_COMPLEXITY_STATUS = (
+    ("🟢", "Light"),
+    ("🟡", "Medium"),
+    ("🟠", "Complicated"),
+    ("🔴", "Hardcore"),
+)
 
 
 def complexity_status(weight: float) -> Tuple[str, str]:
     """Return emoji and label for a game's complexity weight."""
-    if weight < 2:
-        return "🟢", "Light"
-    if weight < 3:
-        return "🟡", "Medium"
-    if weight < 4:
-        return "🟠", "Complicated"
-    return "🔴", "Hardcore"
-
-
-def read_games(path: str):
-    games = []
-    with open(path, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                row_id = int(row["ID"])
-                n = int(row["Users rated"])
-                avg = float(row["Average"])
-                bgg_rank = int(row["Rank"])
-                thumb = row.get("Thumbnail", "")
-            except (ValueError, KeyError):
-                continue
-            S = avg * n
-            row["wilson"] = wilson_lower_bound_10pt(n, S)
-            row["weighted"] = weighted_score(n, S)
-            row["bgg_rank"] = bgg_rank
-            row["id"] = row_id
-            row["thumb"] = thumb
-            games.append(row)
-    return games
-
-
-def enrich_games(games):
+    return _COMPLEXITY_STATUS[bisect_right(_WEIGHT_LIMITS, weight)]
+
+
+CSV_COLUMNS = ("ID", "Name", "Year", "Rank", "Average", "Users rated", "Thumbnail")
+NUMERIC_COLUMNS = ["ID", "Users rated", "Average", "Rank"]
+
+
+def read_games(path: str, limit: Optional[int] = None):
+    """Load scored games from a ratings CSV, reading at most ``limit`` rows."""
+    import pandas as pd
+
+    # Keep the text as exported so the page shows e.g. "8" rather than "8.0";
+    # rows whose numeric fields do not parse are dropped.
+    df = pd.read_csv(
+        path,
+        usecols=lambda c: c in CSV_COLUMNS,
+        dtype=str,
+        keep_default_na=False,
+        encoding="utf-8",
+        nrows=limit,
+    )
+    nums = df[NUMERIC_COLUMNS].apply(pd.to_numeric, errors="coerce")
+    valid = nums.notna().all(axis=1).to_numpy()
+    df = df[valid]
+    nums = nums[valid]
+    n = nums["Users rated"].to_numpy(dtype=np.float64)
+    S = nums["Average"].to_numpy(dtype=np.float64) * n
+    df = df.assign(
+        wilson=_wilson_vec(n, S),
+        weighted=_wilson_vec(n + PRIOR_VOTES, S + _PRIOR_SUM),
+        bgg_rank=nums["Rank"].to_numpy(dtype=np.int64),
+        id=nums["ID"].to_numpy(dtype=np.int64),
+        thumb=df["Thumbnail"] if "Thumbnail" in df else "",
+    )
+    return df.to_dict("records")
+
+
+def enrich_games(games) -> dict:
+    """Merge BGG details into ``games`` in place and return them keyed by id."""
+    details = fetch_details_many(g["id"] for g in games)
     for g in games:
-        details = fetch_details(g["id"])
-        g.update(details)
+        g.update(details[g["id"]])
+    return details
+
+
+_EXPANSION_ICON = "<span title='Expansion'>🧩</span>"
+_REIMPLEMENTS_ICON = "<span title='Reimplements'>♻️</span>"
+_VERSIONS_ICON = "<span title='Has versions'>🌐</span>"
 
 
 def _table_rows(games):
     rows = []
     for idx, g in enumerate(games, 1):
-        link = (
-            f"<a href='https://boardgamegeek.com/boardgame/{g['id']}' "
-            "target='_blank' rel='noopener noreferrer'>" + g["Name"] + "</a>"
-        )
         r_emoji, r_label = status_for_rank(g["bgg_rank"])
-        c_emoji, c_label = complexity_status(g.get("weight", 0.0))
+        weight = g.get("weight", 0.0)
+        c_emoji, c_label = complexity_status(weight)
         thumb = g.get("thumb", "")
-        if thumb:
-            img = (
-                f"<img src='{thumb}' alt='{g['Name']} thumbnail' "
-                "width='48' height='48'>"
-            )
-        else:
-            img = ""
-        parts = [(r_emoji, r_label)]
-        if g.get("is_expansion"):
-            parts.append(("🧩", "Expansion"))
-        if g.get("reimplements"):
-            parts.append(("♻️", "Reimplements"))
-        if g.get("version_count", 0) > 1:
-            parts.append(("🌐", "Has versions"))
-        parts.append((c_emoji, c_label))
-        status_icons = "".join(
-            f"<span title='{lbl}'>{emo}</span>" for emo, lbl in parts
+        img = (
+            f"<img src='{thumb}' alt='{g['Name']} thumbnail' width='48' height='48'>"
+            if thumb
+            else ""
         )
         rows.append(
-            f"<tr><td>{idx}</td><td class='thumb'>{img}</td><td>{link}</td>"
+            f"<tr><td>{idx}</td><td class='thumb'>{img}</td>"
+            f"<td><a href='https://boardgamegeek.com/boardgame/{g['id']}' "
+            f"target='_blank' rel='noopener noreferrer'>{g['Name']}</a></td>"
             f"<td>{g['Year']}</td><td>{g['Users rated']}</td><td>{g['Average']}</td>"
-            f"<td>{g['bgg_rank']}</td><td class='status'>{status_icons}</td>"
-            f"<td>{g.get('weight', 0):.2f}</td>"
+            f"<td>{g['bgg_rank']}</td><td class='status'>"
+            f"<span title='{r_label}'>{r_emoji}</span>"
+            f"{_EXPANSION_ICON if g.get('is_expansion') else ''}"
+            f"{_REIMPLEMENTS_ICON if g.get('reimplements') else ''}"
+            f"{_VERSIONS_ICON if g.get('version_count', 0) > 1 else ''}"
+            f"<span title='{c_label}'>{c_emoji}</span></td>"
+            f"<td>{weight:.2f}</td>"
             f"<td>{g['wilson']:.3f}</td><td>{g['weighted']:.3f}</td></tr>"
         )
     return "\n".join(rows)
 
 
-def generate_html(
-    games_recent, games_all, out_path: str, recent_year: int, snapshot: str
-):
-    html_head = f"""<!DOCTYPE html>
+_PAGE_HEAD = """<!DOCTYPE html>
 <html lang='en'>
 <head>
 <meta charset='UTF-8'>
 <meta name='viewport' content='width=device-width, initial-scale=1'>
 <title>Best Board Game</title>
 <style>
-:root{{
+:root{
   --bg:#fff;
   --text:#333;
   --accent:#007acc;
-}}
-body{{
+}
+body{
   font-family:system-ui,-apple-system,Helvetica,Arial,sans-serif;
   margin:2rem;
   line-height:1.5;
   background:var(--bg);
   color:var(--text);
-}}
-table{{border-collapse:collapse;width:100%;margin-top:1rem;}}
-th,td{{border:1px solid #ccc;padding:0.5rem;text-align:left;}}
-th{{cursor:pointer;background:#f3f3f3;}}
-thead th{{position:sticky;top:0;z-index:1;background:#f3f3f3;}}
-tr:nth-child(even){{background:#fafafa;}}
-td.thumb img{{width:48px;height:auto;display:block;}}
-td.status,th.status{{white-space:nowrap;}}
-button{{background:var(--accent);color:#fff;border:none;border-radius:4px;padding:0.5em 1em;margin-bottom:1rem;cursor:pointer;font-size:1rem;}}
-button:hover{{opacity:0.9;}}
+}
+table{border-collapse:collapse;width:100%;margin-top:1rem;}
+th,td{border:1px solid #ccc;padding:0.5rem;text-align:left;}
+th{cursor:pointer;background:#f3f3f3;}
+thead th{position:sticky;top:0;z-index:1;background:#f3f3f3;}
+tr:nth-child(even){background:#fafafa;}
+td.thumb img{width:48px;height:auto;display:block;}
+td.status,th.status{white-space:nowrap;}
+button{background:var(--accent);color:#fff;border:none;border-radius:4px;padding:0.5em 1em;margin-bottom:1rem;cursor:pointer;font-size:1rem;}
+button:hover{opacity:0.9;}
 </style>
 </head>
 <body>
 <h1>Best Board Game Rankings (Weighted Wilson 99.5% lower bound)</h1>
-<p>Snapshot: {snapshot}</p>
-<button id='toggle'>Show all years</button>
-<table id='recent' class='sortable'>
-<thead>
-<tr>
-  <th class='num'>Rank</th>
-  <th>Thumb</th>
-  <th>Name</th>
-  <th class='num'>Year</th>
-  <th class='num'>Users Rated</th>
-  <th class='num'>Average</th>
-  <th class='num'>BGG Rank</th>
-  <th class='status'>Status</th>
-  <th class='num'>Complexity</th>
-  <th class='num'>Wilson</th>
-  <th class='num'>Weighted</th>
-</tr>
-</thead>
-<tbody>
 """
-    html_tail = f"""
-</tbody>
-</table>
-<template id='all-template'>
-<table id='all' class='sortable' style='display:none'>
-<thead>
+
+_TABLE_HEAD = """<thead>
 <tr>
   <th class='num'>Rank</th>
   <th>Thumb</th>
@@ -253,70 +458,85 @@ button:hover{{opacity:0.9;}}
 </thead>
 <tbody>
 """
-    script = f"""
-</tbody>
-</table>
-</template>
-<script>
-function makeSortable(table){{
+
+_PAGE_SCRIPT = """<script>
+function makeSortable(table){
   const ths = table.tHead.rows[0].cells;
   const dirs = Array(ths.length).fill(true);
-  for(let i=0;i<ths.length;i++){{
-    ths[i].addEventListener('click',()=>{{
+  for(let i=0;i<ths.length;i++){
+    ths[i].addEventListener('click',()=>{
       const tbody = table.tBodies[0];
       const rows = Array.from(tbody.querySelectorAll('tr'));
       const numeric = ths[i].classList.contains('num');
-      rows.sort((a,b)=>{{
+      rows.sort((a,b)=>{
         const A = a.cells[i].textContent.trim();
         const B = b.cells[i].textContent.trim();
-        if(numeric){{
+        if(numeric){
           return (dirs[i]?1:-1)*(parseFloat(A)-parseFloat(B));
-        }}
+        }
         return (dirs[i]?1:-1)*A.localeCompare(B);
-      }});
+      });
       dirs[i] = !dirs[i];
       const frag = document.createDocumentFragment();
       rows.forEach(r=>frag.appendChild(r));
       tbody.appendChild(frag);
-    }});
-  }}
-}}
-function setupToggle(){{
+    });
+  }
+}
+function setupToggle(){
   const btn = document.getElementById('toggle');
   const recent = document.getElementById('recent');
   let all = document.getElementById('all');
-  btn.addEventListener('click',()=>{{
-    if(!all){{
+  btn.addEventListener('click',()=>{
+    if(!all){
       const tmpl = document.getElementById('all-template');
       all = tmpl.content.firstElementChild.cloneNode(true);
       tmpl.replaceWith(all);
       makeSortable(all);
-    }}
-    if(all.style.display==='none'){{
+    }
+    if(all.style.display==='none'){
       recent.style.display='none';
       all.style.display='';
-      btn.textContent='Show {recent_year}+';
-    }}else{{
+      btn.textContent=btn.dataset.recentLabel;
+    }else{
       all.style.display='none';
       recent.style.display='';
       btn.textContent='Show all years';
-    }}
-  }});
-}}
-document.addEventListener('DOMContentLoaded',()=>{{
+    }
+  });
+}
+document.addEventListener('DOMContentLoaded',()=>{
   document.querySelectorAll('table.sortable').forEach(makeSortable);
   setupToggle();
-}});
+});
 </script>
 </body>
 </html>
 """
-    with open(out_path, 'w', encoding='utf-8') as f:
-        f.write(html_head)
-        f.write(_table_rows(games_recent))
-        f.write(html_tail)
-        f.write(_table_rows(games_all))
-        f.write(script)
+
+
+def generate_html(
+    games_recent, games_all, out_path: str, recent_year: int, snapshot: str
+):
+    page = "".join(
+        (
+            _PAGE_HEAD,
+            f"<p>Snapshot: {snapshot}</p>\n",
+            f"<button id='toggle' data-recent-label='Show {recent_year}+'>"
+            "Show all years</button>\n",
+            "<table id='recent' class='sortable'>\n",
+            _TABLE_HEAD,
+            _table_rows(games_recent),
+            "\n</tbody>\n</table>\n<template id='all-template'>\n"
+            "<table id='all' class='sortable' style='display:none'>\n",
+            _TABLE_HEAD,
+            _table_rows(games_all),
+            "\n</tbody>\n</table>\n</template>\n",
+            _PAGE_SCRIPT,
+        )
+    )
+    with open(out_path, "wb") as f:
+        f.write(page.encode("utf-8"))
 
 
 def main():
@@ -337,26 +557,20 @@ def main():
     csv_path = args.csv_file or latest_csv()
     snapshot = timestamp_from_csv(csv_path)
 
-    all_games = read_games(csv_path)
-    games_recent = [g for g in all_games if int(g.get("Year", 0)) >= args.min_year]
-    games_all = list(all_games)
-    games_recent.sort(key=lambda g: g["weighted"], reverse=True)
-    games_all.sort(key=lambda g: g["weighted"], reverse=True)
-    top_ids = {g["id"] for g in games_recent[:200]} | {g["id"] for g in games_all[:200]}
-    details_rows = []
-    for g in all_games:
-        if g["id"] in top_ids:
-            details = fetch_details(g["id"])
-            g.update(details)
-            details_rows.append({"id": g["id"], **details})
-
-    if details_rows:
+    games_all = read_games(csv_path)
+    games_all.sort(key=itemgetter("weighted"), reverse=True)
+    # The sort is stable, so filtering the sorted list gives the same order
+    # as sorting the filtered one.
+    games_recent = [g for g in games_all if int(g.get("Year", 0)) >= args.min_year]
+    details = enrich_games(games_recent[:200] + games_all[:200])
+
+    if details:
         with open(args.details_csv, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(
-                f, fieldnames=["id", "weight", "is_expansion", "reimplements", "version_count"]
+            writer = csv.writer(f)
+            writer.writerow(["id", *DETAIL_FIELDS])
+            writer.writerows(
+                [game_id, *(d[k] for k in DETAIL_FIELDS)] for game_id, d in details.items()
             )
-            writer.writeheader()
-            writer.writerows(details_rows)
     generate_html(games_recent[:200], games_all[:200], args.output, args.min_year, snapshot)
 
 
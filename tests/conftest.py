@@ -0,0 +1,45 @@
+from pathlib import Path
+import pytest
+import generate_page as gp
+
+
+@pytest.fixture(scope="session")
+def xml_174430():
+    return Path(__file__).with_name("174430.xml").read_bytes()
+
+
+@pytest.fixture(scope="session")
+def xml_174430_details(xml_174430):
+    return gp.parse_details(xml_174430)
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+@pytest.fixture
+def bgg_response(monkeypatch, tmp_path):
+    """Keep the cache in tmp_path, skip rate limiting, and fake BGG replies.
+
+    Returns a function that sets the reply body and returns the list of
+    requested URLs.
+    """
+    body = [b"<items/>"]
+    urls = []
+
+    def fake_get(url, timeout):
+        urls.append(url)
+        return FakeResponse(body[0])
+
+    def respond(xml):
+        body[0] = xml
+        return urls
+
+    monkeypatch.setattr(gp, "CACHE_PATH", str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(gp._session, "get", fake_get)
+    monkeypatch.setattr(gp, "_bgg_limiter", gp.RateLimiter(0))
+    return respond
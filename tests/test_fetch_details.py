@@ -0,0 +1,86 @@
+import sqlite3
+import time
+import generate_page as gp
+
+
+def test_fetch_details_many_batches_unique_ids(monkeypatch, bgg_response):
+    batches = []
+
+    def fake_batch(game_ids):
+        batches.append(list(game_ids))
+        return {game_id: {"weight": float(game_id)} for game_id in game_ids}
+
+    monkeypatch.setattr(gp, "BGG_BATCH_SIZE", 2)
+    monkeypatch.setattr(gp, "_fetch_batch", fake_batch)
+    details = gp.fetch_details_many([3, 1, 3, 2, 5])
+    assert sorted(batches) == [[2, 5], [3, 1]]
+    assert list(details) == [3, 1, 2, 5]
+    assert details[5] == {"weight": 5.0}
+
+
+def test_fetch_details_many_splits_multi_item_response(bgg_response):
+    urls = bgg_response(
+        b"<items>"
+        b"<item type='boardgame' id='1'><versions><item id='10'/><item id='11'/></versions></item>"
+        b"<item type='boardgameexpansion' id='2'/>"
+        b"</items>"
+    )
+    details = gp.fetch_details_many([1, 2, 3])
+    assert len(urls) == 1 and "id=1,2,3&" in urls[0]
+    assert details[1]["version_count"] == 2
+    assert details[2]["is_expansion"]
+    assert details[3] == {
+        "weight": 0.0,
+        "is_expansion": False,
+        "reimplements": False,
+        "version_count": 0,
+    }
+
+
+def test_rate_limiter_spaces_calls():
+    limiter = gp.RateLimiter(0.05)
+    start = time.monotonic()
+    for _ in range(3):
+        limiter.wait()
+    assert time.monotonic() - start >= 0.1
+
+
+def test_fetch_details_uses_disk_cache(bgg_response, xml_174430, xml_174430_details):
+    calls = bgg_response(xml_174430)
+    gp.fetch_details.cache_clear()
+    first = gp.fetch_details(174430)
+    gp.fetch_details.cache_clear()
+    second = gp.fetch_details(174430)
+    gp.fetch_details.cache_clear()
+    assert len(calls) == 1
+    assert second == first
+    assert first == xml_174430_details
+
+
+def test_cache_drops_entries_from_other_format(monkeypatch, bgg_response):
+    gp._cache_put({1: {"weight": 2.0}})
+    assert gp._cache_get([1]) == {1: {"weight": 2.0}}
+    monkeypatch.setattr(gp, "CACHE_FORMAT", gp.CACHE_FORMAT + 1)
+    assert gp._cache_get([1]) == {}
+
+
+def test_fetch_batch_skips_items_without_id(bgg_response):
+    bgg_response(b"<items><item type='boardgame'/><item type='boardgameexpansion' id='2'/></items>")
+    details = gp._fetch_batch([1, 2])
+    assert list(details) == [2]
+    assert details[2]["is_expansion"]
+
+
+def test_fetch_batch_survives_cache_write_errors(monkeypatch, bgg_response):
+    def broken_put(details):
+        raise sqlite3.OperationalError("database is locked")
+
+    bgg_response(b"<items><item type='boardgameexpansion' id='2'/></items>")
+    monkeypatch.setattr(gp, "_cache_put", broken_put)
+    assert gp._fetch_batch([2])[2]["is_expansion"]
+
+
+def test_fetch_details_many_survives_unopenable_cache(monkeypatch, tmp_path, bgg_response):
+    bgg_response(b"<items><item type='boardgameexpansion' id='2'/></items>")
+    monkeypatch.setattr(gp, "CACHE_PATH", str(tmp_path / "missing" / "cache.sqlite"))
+    assert gp.fetch_details_many([2])[2]["is_expansion"]
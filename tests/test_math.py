@@ -1,10 +1,9 @@
 import csv
 import math
+import numpy as np
 from pathlib import Path
 import pytest
 
-import sys
-sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 import generate_page as gp
 
 
@@ -47,3 +46,26 @@ def test_status_labels():
     assert gp.status_for_rank(10) == ("🔥", "Bestseller")
     assert gp.status_for_rank(500) == ("🔎", "Rare find")
     assert gp.status_for_rank(2000) == ("💎", "Hidden gem")
+    assert gp.status_for_rank(200)[1] == "Bestseller"
+    assert gp.status_for_rank(201)[1] == "Rare find"
+    assert gp.status_for_rank(1000)[1] == "Rare find"
+    assert gp.status_for_rank(1001)[1] == "Hidden gem"
+
+
+def _manual_wilson(n, S, z=gp.DEFAULT_Z):
+    if n <= 0:
+        return 0.0
+    R = S / n
+    p = (R - 1) / 9.0
+    denom = 1 + z * z / n
+    centre = p + z * z / (2 * n)
+    adj = z * math.sqrt((p * (1 - p) + z * z / (4 * n)) / n)
+    return 1 + 9 * (centre - adj) / denom
+
+
+def test_wilson_vec_matches_manual():
+    n = [0, 1, 30, 100, 52461]
+    S = [0.0, 7.0, 30 * 6.2, 800.0, 52461 * 8.58]
+    vec = gp._wilson_vec(np.asarray(n, dtype=float), np.asarray(S, dtype=float))
+    expected = [_manual_wilson(k, s) for k, s in zip(n, S)]
+    assert vec.tolist() == pytest.approx(expected)
@@ -1,35 +1,102 @@
 import csv
 from pathlib import Path
 import pytest
-import sys
-sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 import generate_page as gp
 
 
-def test_parse_details_sample():
-    xml_path = Path(__file__).with_name("174430.xml")
-    xml = xml_path.read_text(encoding="utf-8")
-    details = gp.parse_details(xml)
+def test_parse_details_sample(xml_174430_details):
+    details = xml_174430_details
     assert details["version_count"] >= 28
     assert details["weight"] == pytest.approx(3.9149, rel=1e-4)
     assert not details["is_expansion"]
     assert not details["reimplements"]
 
 
+def test_parse_details_returns_fresh_dict(xml_174430):
+    details = gp.parse_details(xml_174430)
+    details["weight"] = 99
+    assert gp.parse_details(xml_174430)["weight"] != 99
+
+
+def test_parse_details_accepts_bytearray(xml_174430, xml_174430_details):
+    assert gp.parse_details(bytearray(xml_174430)) == xml_174430_details
+
+
+def test_parse_details_accepts_str(xml_174430, xml_174430_details):
+    assert gp.parse_details(xml_174430.decode("utf-8")) == xml_174430_details
+
+
+def test_parse_details_missing_attributes():
+    xml = (
+        "<items><item type='boardgame' id='1'>"
+        "<statistics><ratings><averageweight value=''/></ratings></statistics>"
+        "<versions><item type='boardgameversion'/><item id='2'/></versions>"
+        "</item></items>"
+    )
+    details = gp.parse_details(xml)
+    assert details["weight"] == 0.0
+    assert details["version_count"] == 1
+
+
+def test_parse_details_dedupes_versions():
+    xml = (
+        "<items><item type='boardgame' id='1'>"
+        "<link type='boardgameimplementation' id='7' inbound='true'/>"
+        "<versions>"
+        "<item type='boardgameversion' id='2'>"
+        "<link type='boardgameversion' id='1' inbound='true'/>"
+        "</item>"
+        "<item type='boardgameversion' id='2'/>"
+        "<item type='boardgameversion' id='3'/>"
+        "</versions></item></items>"
+    )
+    details = gp.parse_details(xml)
+    assert details["version_count"] == 2
+    assert details["reimplements"]
+
+
+def test_parse_details_reads_only_first_item():
+    # The second item is never closed; parse_details must not reach it.
+    xml = (
+        "<items><item type='boardgameexpansion' id='1'/>"
+        "<item type='boardgame' id='2'><versions>"
+    )
+    assert gp.parse_details(xml)["is_expansion"]
+
+
 def test_games_columns_unique():
     csv_files = sorted(Path(".").glob("20*.csv"))
     assert csv_files
-    games = gp.read_games(str(csv_files[-1]))
+    games = gp.read_games(str(csv_files[-1]), limit=10)
+    assert len(games) == 10
     assert len({g["wilson"] for g in games[:10]}) > 1
     assert len({g["weighted"] for g in games[:10]}) > 1
     assert len({g["bgg_rank"] for g in games[:10]}) > 1
 
 
+def test_read_games_skips_unparsable_rows(tmp_path):
+    csv_path = tmp_path / "ratings.csv"
+    csv_path.write_text(
+        "ID,Name,Year,Rank,Average,Bayes average,Users rated,URL,Thumbnail\n"
+        "1,Good,2020,5,8,7.9,120,/boardgame/1,\n"
+        "2,Unranked,2021,Not Ranked,7.5,0,40,/boardgame/2,\n",
+        encoding="utf-8",
+    )
+    games = gp.read_games(str(csv_path))
+    assert [g["id"] for g in games] == [1]
+    assert games[0]["Average"] == "8"
+    assert games[0]["bgg_rank"] == 5
+    assert games[0]["thumb"] == ""
+
+
 def test_complexity_status_boundaries():
     assert gp.complexity_status(1.5)[1] == "Light"
     assert gp.complexity_status(2.5)[1] == "Medium"
     assert gp.complexity_status(3.5)[1] == "Complicated"
     assert gp.complexity_status(4.5)[1] == "Hardcore"
+    assert gp.complexity_status(2.0)[1] == "Medium"
+    assert gp.complexity_status(3.0)[1] == "Complicated"
+    assert gp.complexity_status(4.0)[1] == "Hardcore"
 
 
 def test_version_icon_threshold():
@@ -59,3 +126,16 @@ def test_version_icon_threshold():
     ]
     html = gp._table_rows(games)
     assert html.count("🌐") == 1
+
+
+def test_latest_csv_picks_newest_snapshot(tmp_path, monkeypatch):
+    for name in ("2025-06-18T11-00-01.csv", "2025-07-12T00-37-56.csv", "details.csv"):
+        (tmp_path / name).write_text("", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    assert gp.latest_csv() == "2025-07-12T00-37-56.csv"
+
+
+def test_latest_csv_missing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(FileNotFoundError):
+        gp.latest_csv()